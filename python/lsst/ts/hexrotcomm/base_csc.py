@@ -23,6 +23,7 @@ __all__ = ["BaseCsc"]
 
 import abc
 import asyncio
+import collections.abc
 import ctypes
 import traceback
 import types
@@ -47,6 +48,9 @@ MAX_STATE_CHANGE_TELEMETRY_MESSAGES = 5
 # after connecting to the low-level controller.
 CONFIG_TIMEOUT = 10
 
+# Names of the parameter fields of a command.
+COMMAND_PARAM_NAMES = ("param1", "param2", "param3", "param4", "param5", "param6")
+
 
 def make_connect_error_info(
     prefix: str, connected: bool, connect_descr: str
@@ -388,6 +392,51 @@ class BaseCsc(salobj.ConfigurableCsc):
         command.param6 = param6
         return command
 
+    def make_commands(
+        self, code: IntEnum, **params: collections.abc.Sequence[float]
+    ) -> list[structs.Command]:
+        """Make several commands with the same command code.
+
+        The commands share one ctypes array, so they are allocated at once.
+
+        Parameters
+        ----------
+        code : ``CommandCode``
+            Command code for all of the commands.
+        **params : `collections.abc.Sequence` [`float`]
+            Values for any of param1, param2, ... param6; one value per
+            command. All sequences must have the same length, which is
+            the number of commands. Omitted parameters are 0.
+
+        Returns
+        -------
+        commands : `list` [`Command`]
+            The commands, with ``counter`` 0, as for `make_command`.
+
+        Raises
+        ------
+        ValueError
+            If no parameter is specified, if a parameter name is not valid,
+            or if the sequences have different lengths.
+        """
+        invalid_names = params.keys() - set(COMMAND_PARAM_NAMES)
+        if invalid_names:
+            raise ValueError(f"Invalid parameter names {sorted(invalid_names)}")
+        lengths = {len(values) for values in params.values()}
+        if len(lengths) != 1:
+            raise ValueError(
+                "Must specify at least one parameter, "
+                f"and all must have the same length; lengths={lengths}"
+            )
+        code = self.CommandCode(code)
+        commands = (structs.Command * lengths.pop())()
+        for name, values in params.items():
+            for command, value in zip(commands, values):
+                setattr(command, name, value)
+        for command in commands:
+            command.code = code
+        return list(commands)
+
     async def run_command(
         self,
         code: IntEnum,
@@ -18,13 +18,13 @@
 #
 # You should have received a copy of the GNU General Public License
 
-__all__ = ["BaseMockController"]
+__all__ = ["BaseMockController", "make_command_key"]
 
 import abc
 import asyncio
 import ctypes
+import functools
 import logging
-import math
 import typing
 from enum import IntEnum
 
@@ -33,6 +33,79 @@ from lsst.ts.xml.enums.MTHexapod import ControllerState, EnabledSubstate
 
 from . import enums, structs
 
+# Number of nanoseconds in a second.
+NSEC_PER_SEC = 1_000_000_000
+
+# Number of low bits of a command key used for int(param1);
+# the command code is in the bits above that.
+COMMAND_KEY_PARAM1_BITS = 16
+
+# Command key that matches no command; used for out of range param1.
+INVALID_COMMAND_KEY = -1
+
+# Maximum number of commands read from the client at one time.
+COMMAND_BUFFER_LEN = 16
+
+TelemetryCallbackType = typing.Callable[[ctypes.Structure], typing.Awaitable[None]]
+
+
+def make_command_key(code: int, param1: int | None = None) -> int:
+    """Make a key for `BaseMockController.command_table`.
+
+    Parameters
+    ----------
+    code : `int`
+        Command code.
+    param1 : `int` or `None`, optional
+        Integer value of param1, for commands whose meaning depends on it
+        (SET_STATE and SET_ENABLED_SUBSTATE), else `None`.
+
+    Returns
+    -------
+    key : `int`
+        The command key, or `INVALID_COMMAND_KEY` if param1 is out of range.
+    """
+    key = int(code) << COMMAND_KEY_PARAM1_BITS
+    if param1 is None:
+        return key
+    if not 0 <= param1 < 1 << COMMAND_KEY_PARAM1_BITS:
+        return INVALID_COMMAND_KEY
+    return key | param1
+
+
+@functools.cache
+def _get_standard_commands(
+    CommandCode: typing.Callable[[IntEnum], IntEnum]
+) -> tuple[tuple[int, str], ...]:
+    """Get the commands that `BaseMockController` supports for all
+    controllers, as (command key, method name) pairs.
+
+    Cached by ``CommandCode``, so the keys are only computed
+    for the first controller constructed with a given ``CommandCode``.
+    """
+    set_state = CommandCode.SET_STATE  # type: ignore[attr-defined]
+    return (
+        (make_command_key(set_state, enums.SetStateParam.ENABLE), "do_enable"),
+        (make_command_key(set_state, enums.SetStateParam.STANDBY), "do_standby"),
+        (
+            make_command_key(set_state, enums.SetStateParam.CLEAR_ERROR),
+            "do_clear_error",
+        ),
+        (
+            make_command_key(CommandCode.ENABLE_DRIVES),  # type: ignore[attr-defined]
+            "do_enable_drives",
+        ),
+    )
+
+
+@functools.lru_cache(maxsize=128)
+def _encode_reason(reason: str) -> bytes:
+    """Encode a command status reason, truncated to fit the field.
+
+    Cached because the same few reasons tend to be repeated.
+    """
+    return reason.encode()[: structs.COMMAND_STATUS_REASON_LEN]
+
 
 class CommandError(Exception):
     """Low-level command failed."""
@@ -50,9 +123,11 @@ class BaseMockController(tcpip.OneClientReadLoopServer, abc.ABC):
     ----------
     log : `logging.Logger`
         Logger.
-    extra_commands : dict of command key: method
-        Device-specific commands, as a dict of command key (as returned by
-        `get_command_key`): method to call for that command.
+    extra_commands : dict of command code or (code, param1): method
+        Device-specific commands, as a dict of command code: method
+        to call for that command. For SET_STATE and SET_ENABLED_SUBSTATE
+        commands, whose meaning depends on param1, the key is a tuple
+        of (command code, int param1) instead.
         Note: BaseMockController already supports the standard state
         transition commands, including CLEAR_ERROR.
         If the command is not done when the method returns,
@@ -79,6 +154,19 @@ class BaseMockController(tcpip.OneClientReadLoopServer, abc.ABC):
     initial_state : `lsst.ts.xml.enums.MTHexapod.ControllerState` (optional)
         Initial state of mock controller.
 
+    Attributes
+    ----------
+    telemetry_callback : coroutine or `None`
+        Coroutine to call after each telemetry message is written,
+        or `None` (the default) for none. The function receives one
+        argument: the telemetry struct. Intended for unit tests that
+        want to see telemetry without going through a CSC.
+    manual_mode : `bool`
+        If true then `telemetry_loop` stops writing telemetry, and telemetry
+        is only written when you call `tick_once` or `write_telemetry`.
+        Intended for unit tests that want to control exactly when
+        telemetry is written. False by default.
+
     Notes
     -----
     To start a mock controller:
@@ -109,20 +197,25 @@ class BaseMockController(tcpip.OneClientReadLoopServer, abc.ABC):
         self.config = config
         self.telemetry = telemetry
 
-        # Dict of command key: command
-        self.command_table = {
-            (CommandCode.SET_STATE, enums.SetStateParam.ENABLE): self.do_enable,  # type: ignore[attr-defined]
+        # Command codes for which the command key includes param1.
+        self._param1_codes = frozenset(
             (
-                CommandCode.SET_STATE,  # type: ignore[attr-defined]
-                enums.SetStateParam.STANDBY,
-            ): self.do_standby,
-            (
-                CommandCode.SET_STATE,  # type: ignore[attr-defined]
-                enums.SetStateParam.CLEAR_ERROR,
-            ): self.do_clear_error,
-            CommandCode.ENABLE_DRIVES: self.do_enable_drives,  # type: ignore[attr-defined]
+                int(CommandCode.SET_STATE),  # type: ignore[attr-defined]
+                int(CommandCode.SET_ENABLED_SUBSTATE),  # type: ignore[attr-defined]
+            )
+        )
+
+        # Dict of command key (as returned by `get_command_key`): command
+        self.command_table = {
+            key: getattr(self, method_name)
+            for key, method_name in _get_standard_commands(CommandCode)
         }
-        self.command_table.update(extra_commands)
+        for key, method in extra_commands.items():
+            if isinstance(key, tuple):
+                command_key = make_command_key(key[0], int(key[1]))
+            else:
+                command_key = make_command_key(key)
+            self.command_table[command_key] = method
 
         # A dictionary of frame ID: header for command status,
         # telemetry and config data. Keeping separate headers for each
@@ -134,6 +227,17 @@ class BaseMockController(tcpip.OneClientReadLoopServer, abc.ABC):
             header.frame_id = frame_id
             self.headers[frame_id] = header
 
+        # Buffer for commands read from the client, and the number of bytes
+        # of data in it (which may end with a partial command).
+        # See `read_and_dispatch` for details.
+        self._command_buffer = bytearray(
+            ctypes.sizeof(structs.Command) * COMMAND_BUFFER_LEN
+        )
+        self._command_nbytes = 0
+
+        # Command status, reused by `write_command_status`.
+        self._command_status = structs.CommandStatus()
+
         super().__init__(
             name="MockController",
             host=host,
@@ -145,6 +249,10 @@ class BaseMockController(tcpip.OneClientReadLoopServer, abc.ABC):
 
         self.telemetry_loop_task = utils.make_done_future()
 
+        self.telemetry_callback: TelemetryCallbackType | None = None
+
+        self.manual_mode = False
+
     @property
     def state(self) -> int:
         return self.telemetry.state
@@ -159,14 +267,15 @@ class BaseMockController(tcpip.OneClientReadLoopServer, abc.ABC):
             enabled_substate=EnabledSubstate.STATIONARY,
         )
 
-    def get_command_key(self, command: structs.Command) -> typing.Any:
-        """Return the key to command_table."""
-        if command.code in (
-            self.CommandCode.SET_STATE,  # type: ignore[attr-defined]
-            self.CommandCode.SET_ENABLED_SUBSTATE,  # type: ignore[attr-defined]
-        ):
-            return (command.code, int(command.param1))  # type: ignore[attr-defined]
-        return command.code
+    def get_command_key(self, command: structs.Command) -> int:
+        """Return the key to command_table.
+
+        See `make_command_key` for the format.
+        """
+        code = command.code
+        if code in self._param1_codes:
+            return make_command_key(code, int(command.param1))
+        return code << COMMAND_KEY_PARAM1_BITS
 
     def assert_state(
         self,
@@ -242,17 +351,18 @@ class BaseMockController(tcpip.OneClientReadLoopServer, abc.ABC):
         CommandError
             If the command fails.
         """
-        self.log.debug(
-            "run_command: "
-            f"counter={command.counter}; "
-            f"command={self.CommandCode(command.code)!r}; "
-            f"param1={command.param1}; "
-            f"param2={command.param2}; "
-            f"param3={command.param3}; "
-            f"param4={command.param4}; "
-            f"param5={command.param5}; "
-            f"param6={command.param6}"
-        )
+        if self.log.isEnabledFor(logging.DEBUG):
+            self.log.debug(
+                "run_command: "
+                f"counter={command.counter}; "
+                f"command={self.CommandCode(command.code)!r}; "
+                f"param1={command.param1}; "
+                f"param2={command.param2}; "
+                f"param3={command.param3}; "
+                f"param4={command.param4}; "
+                f"param5={command.param5}; "
+                f"param6={command.param6}"
+            )
         key = self.get_command_key(command)
         cmd_method = self.command_table.get(key, None)
         if cmd_method is None:
@@ -291,16 +401,17 @@ class BaseMockController(tcpip.OneClientReadLoopServer, abc.ABC):
         * `lsst.ts.xml.enums.MTHexapod.EnabledSubstate.STATIONARY`
           if state == `lsst.ts.xml.enums.MTHexapod.ControllerState.ENABLED`
         """
-        self.telemetry.state = ControllerState(state)
-        self.telemetry.enabled_substate = (
-            EnabledSubstate.STATIONARY
-            if self.telemetry.state == ControllerState.ENABLED
-            else 0
-        )
-        self.log.debug(
-            f"set_state: state={ControllerState(self.telemetry.state)!r}; "
-            f"enabled_substate={EnabledSubstate(self.telemetry.enabled_substate)}"
+        state = ControllerState(state)
+        enabled_substate = (
+            EnabledSubstate.STATIONARY if state == ControllerState.ENABLED else 0
         )
+        self.telemetry.state = state
+        self.telemetry.enabled_substate = enabled_substate
+        if self.log.isEnabledFor(logging.DEBUG):
+            self.log.debug(
+                f"set_state: state={state!r}; "
+                f"enabled_substate={EnabledSubstate(enabled_substate)}"
+            )
 
     @abc.abstractmethod
     async def update_telemetry(self, curr_tai: float) -> None:
@@ -322,13 +433,60 @@ class BaseMockController(tcpip.OneClientReadLoopServer, abc.ABC):
         If not connected: stop the command and telemetry loops.
         """
         self.telemetry_loop_task.cancel()
+        self._command_nbytes = 0
         if self.connected:
             self.telemetry_loop_task = asyncio.create_task(self.telemetry_loop())
 
     async def read_and_dispatch(self) -> None:
-        """Read and execute one command."""
-        command = structs.Command()
-        await self.read_into(command)
+        """Read and execute all available commands.
+
+        Wait for at least one complete command, reading as much data
+        as is available (up to `COMMAND_BUFFER_LEN` commands), then execute
+        each complete command, in order. Any partial command is kept
+        for the next call.
+
+        Each command is a copy, so command methods may keep it.
+
+        Raises
+        ------
+        asyncio.IncompleteReadError
+            If the client closes the connection.
+        """
+        command_size = ctypes.sizeof(structs.Command)
+        buffer = self._command_buffer
+        nbytes = self._command_nbytes
+        while nbytes < command_size:
+            data = await self.read(len(buffer) - nbytes)
+            if not data:
+                raise asyncio.IncompleteReadError(
+                    partial=bytes(buffer[:nbytes]), expected=command_size
+                )
+            buffer[nbytes : nbytes + len(data)] = data
+            nbytes += len(data)
+            self._command_nbytes = nbytes
+
+        ncommands = nbytes // command_size
+        commands = [
+            structs.Command.from_buffer_copy(buffer, i * command_size)
+            for i in range(ncommands)
+        ]
+
+        # Move the partial command (if any) to the start of the buffer.
+        nused = ncommands * command_size
+        self._command_nbytes = nbytes - nused
+        buffer[: self._command_nbytes] = buffer[nused:nbytes]
+
+        for command in commands:
+            await self.dispatch_command(command)
+
+    async def dispatch_command(self, command: structs.Command) -> None:
+        """Execute one command and write its command status.
+
+        Parameters
+        ----------
+        command : `structs.Command`
+            The command to execute.
+        """
         try:
             duration = await self.run_command(command)
         except CommandError as e:
@@ -359,16 +517,32 @@ class BaseMockController(tcpip.OneClientReadLoopServer, abc.ABC):
         await super().close_client(**kwargs)
 
     async def telemetry_loop(self) -> None:
-        """Write configuration once, then telemetry at regular intervals."""
+        """Write configuration once, then telemetry at regular intervals.
+
+        Each telemetry message is scheduled relative to the previous
+        deadline, rather than relative to when the previous message
+        was written, so the time taken to compute and write telemetry
+        does not make the cadence drift. If the loop falls more than one
+        interval behind, the schedule restarts from the current time.
+
+        While `manual_mode` is true the loop keeps running,
+        but does not write telemetry.
+        """
         self.log.info("telemetry_loop begins")
         try:
             if self.connected:
                 await self.write_config()
+            loop = asyncio.get_running_loop()
+            next_time = loop.time()
             while self.connected:
-                header, curr_tai = self.update_and_get_header(enums.FrameId.TELEMETRY)
-                await self.update_telemetry(curr_tai=curr_tai)
-                await self.write_from(header, self.telemetry)
-                await asyncio.sleep(self.telemetry_interval)
+                if not self.manual_mode:
+                    await self.tick_once()
+                next_time += self.telemetry_interval
+                delay = next_time - loop.time()
+                if delay < -self.telemetry_interval:
+                    next_time = loop.time()
+                # Always sleep, even if behind, to let other tasks run.
+                await asyncio.sleep(max(delay, 0))
             self.log.info("Socket disconnected")
         except asyncio.CancelledError:
             raise
@@ -396,9 +570,9 @@ class BaseMockController(tcpip.OneClientReadLoopServer, abc.ABC):
         """
         header = self.headers[frame_id]
         curr_tai = utils.current_tai()
-        tai_frac, tai_sec = math.modf(curr_tai)
-        header.tai_sec = int(tai_sec)
-        header.tai_nsec = int(tai_frac * 1e9)
+        header.tai_sec, header.tai_nsec = divmod(
+            int(curr_tai * NSEC_PER_SEC), NSEC_PER_SEC
+        )
         return header, curr_tai
 
     async def write_config(self) -> None:
@@ -410,7 +584,50 @@ class BaseMockController(tcpip.OneClientReadLoopServer, abc.ABC):
             If not connected.
         """
         header, curr_tai = self.update_and_get_header(enums.FrameId.CONFIG)
-        await self.write_from(header, self.config)
+        await self._write_frame(header, self.config)
+
+    async def tick_once(self) -> None:
+        """Update telemetry and write it once.
+
+        `telemetry_loop` calls this once per `telemetry_interval`.
+        Unit tests can set `manual_mode` true and call this directly,
+        to control exactly when telemetry is written.
+
+        Raises
+        ------
+        ConnectionError
+            If not connected.
+        """
+        header, curr_tai = self.update_and_get_header(enums.FrameId.TELEMETRY)
+        await self.update_telemetry(curr_tai=curr_tai)
+        await self._write_frame(header, self.telemetry)
+        await self._call_telemetry_callback()
+
+    async def write_telemetry(self) -> None:
+        """Write the current telemetry.
+
+        `telemetry_loop` normally writes telemetry; call this to report
+        a change (e.g. from `set_state`) without waiting for the next
+        telemetry message. Unlike `telemetry_loop`, this does not call
+        `update_telemetry`.
+
+        Raises
+        ------
+        ConnectionError
+            If not connected.
+        """
+        header, curr_tai = self.update_and_get_header(enums.FrameId.TELEMETRY)
+        await self._write_frame(header, self.telemetry)
+        await self._call_telemetry_callback()
+
+    async def _call_telemetry_callback(self) -> None:
+        """Call telemetry_callback, if specified, and log any error."""
+        if self.telemetry_callback is None:
+            return
+        try:
+            await self.telemetry_callback(self.telemetry)
+        except Exception:
+            self.log.exception("telemetry_callback failed")
 
     async def write_command_status(
         self,
@@ -442,9 +659,43 @@ class BaseMockController(tcpip.OneClientReadLoopServer, abc.ABC):
             duration = 0
         header, curr_tai = self.update_and_get_header(enums.FrameId.COMMAND_STATUS)
         header.counter = counter
-        command_status = structs.CommandStatus(
-            status=status,
-            duration=duration,
-            reason=reason.encode()[0 : structs.COMMAND_STATUS_REASON_LEN],
+        # Reuse one command status; this is safe because _write_frame
+        # copies the data. Zero it first so no part of a longer
+        # previous reason is left after the new one.
+        command_status = self._command_status
+        ctypes.memset(
+            ctypes.addressof(command_status), 0, ctypes.sizeof(command_status)
         )
-        await self.write_from(header, command_status)
+        command_status.status = status
+        command_status.duration = duration
+        command_status.reason = _encode_reason(reason)
+        await self._write_frame(header, command_status)
+
+    async def _write_frame(
+        self, header: structs.Header, data: ctypes.Structure
+    ) -> None:
+        """Write a header and the struct that follows it as one message.
+
+        Parameters
+        ----------
+        header : `structs.Header`
+            Header for the message.
+        data : `ctypes.Structure`
+            Command status, configuration or telemetry.
+
+        Raises
+        ------
+        ConnectionError
+            If not connected.
+
+        Notes
+        -----
+        The header and data are written with a single ``writelines``
+        (and one drain), which the transport can send with one
+        ``sendmsg`` call, without first concatenating them.
+        Each struct is copied to `bytes`, rather than passed as a
+        `memoryview`, because the transport may hold on to the buffers
+        until they are actually sent, and the header and data structs
+        are reused for the next message.
+        """
+        await self.writelines((bytes(header), bytes(data)))
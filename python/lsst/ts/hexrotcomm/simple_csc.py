@@ -21,6 +21,7 @@
 
 __all__ = ["SimpleCsc"]
 
+import functools
 from pathlib import Path
 
 from lsst.ts import hexrotcomm, salobj, utils
@@ -32,6 +33,16 @@ from .command_telemetry_client import CommandTelemetryClient
 from .config_schema import CONFIG_SCHEMA
 
 
+@functools.cache
+def _get_mtrotator_command_names() -> tuple[str, ...]:
+    """Get the names of the MTRotator commands, without the cmd_ prefix.
+
+    Cached, because parsing the component info is slow.
+    """
+    component_info = ComponentInfo("MTRotator", "sal")
+    return tuple(name[4:] for name in component_info.topics if name.startswith("cmd_"))
+
+
 class SimpleCsc(hexrotcomm.BaseCsc):
     """Simple CSC to talk to SimpleMockController.
 
@@ -100,17 +111,7 @@ class SimpleCsc(hexrotcomm.BaseCsc):
         override: str = "",
     ) -> None:
         # Workaround the checking of "do_" commands in upstream
-        supported_command_names = [
-            name[3:] for name in dir(self) if name.startswith("do_")
-        ]
-
-        component_info = ComponentInfo("MTRotator", "sal")
-        topic_names = [
-            name[4:] for name in component_info.topics if name.startswith("cmd_")
-        ]
-        for topic_name in topic_names:
-            if topic_name not in supported_command_names:
-                setattr(self, f"do_{topic_name}", self._do_nothing)
+        self._add_unsupported_do_methods()
 
         super().__init__(
             name="MTRotator",
@@ -125,6 +126,30 @@ class SimpleCsc(hexrotcomm.BaseCsc):
             simulation_mode=simulation_mode,
         )
 
+    @classmethod
+    @functools.cache
+    def _add_unsupported_do_methods(cls) -> None:
+        """Add ``_do_nothing`` as the do_ method for each MTRotator command
+        that this class does not support.
+
+        The methods are added to the class, the first time it is
+        constructed, so later instances need not do any work.
+        """
+        supported_command_names = cls._supported_command_names()
+        for command_name in _get_mtrotator_command_names():
+            if command_name not in supported_command_names:
+                setattr(cls, f"do_{command_name}", cls._do_nothing)
+
+    @classmethod
+    @functools.cache
+    def _supported_command_names(cls) -> frozenset[str]:
+        """Get the names of the commands this class implements.
+
+        Computed once per class, before `_add_unsupported_do_methods`
+        adds the placeholder do_ methods, so those are not included.
+        """
+        return frozenset(name[3:] for name in dir(cls) if name.startswith("do_"))
+
     async def _do_nothing(self, data: salobj.BaseMsgType) -> None:
         raise salobj.ExpectedError("Not implemented")
 
@@ -173,23 +198,22 @@ class SimpleCsc(hexrotcomm.BaseCsc):
         client : `CommandTelemetryClient`
             TCP/IP client.
         """
+        telemetry = client.telemetry
         # Strangely telemetry.state and enabled_substate
         # are all floats from the controller. But they should only have
         # integer value, so I output them as integers.
         await self.evt_controllerState.set_write(
-            controllerState=int(client.telemetry.state),
-            enabledSubstate=int(client.telemetry.enabled_substate),
+            controllerState=int(telemetry.state),
+            enabledSubstate=int(telemetry.enabled_substate),
         )
-        await self.evt_commandableByDDS.set_write(
-            state=bool(
-                client.telemetry.application_status
-                & ApplicationStatus.DDS_COMMAND_SOURCE
-            )
+        commandable_by_dds = bool(
+            telemetry.application_status & ApplicationStatus.DDS_COMMAND_SOURCE
         )
+        await self.evt_commandableByDDS.set_write(state=commandable_by_dds)
 
         await self.tel_rotation.set_write(
-            demandPosition=client.telemetry.cmd_position,
-            actualPosition=client.telemetry.curr_position,
+            demandPosition=telemetry.cmd_position,
+            actualPosition=telemetry.curr_position,
             timestamp=utils.current_tai(),
         )
 
@@ -21,6 +21,7 @@
 
 import asyncio
 import contextlib
+import ctypes
 import logging
 import unittest
 
@@ -382,6 +383,96 @@ class CommandTelemetryClientTestCase(unittest.IsolatedAsyncioTestCase):
             assert len(command_status.reason) < len(too_long_reason_bytes)
             assert command_status.reason == too_long_reason_bytes[0:reason_len]
 
+    async def test_read_multiple_commands(self) -> None:
+        """Test that the mock controller runs all commands that arrive
+        together, in order, including one split across two writes.
+        """
+        async with self.make_mock_controller() as mock_ctrl, tcpip.Client(
+            host=mock_ctrl.host, port=mock_ctrl.port, log=mock_ctrl.log
+        ) as client:
+            await asyncio.wait_for(mock_ctrl.connected_task, timeout=STD_TIMEOUT)
+            positions = (1, 2, 3)
+            commands = []
+            for counter, position in enumerate(positions):
+                command = hexrotcomm.Command()
+                command.counter = counter
+                command.code = hexrotcomm.SimpleCommandCode.MOVE
+                command.param1 = position
+                commands.append(command)
+            data = b"".join(bytes(command) for command in commands)
+            split_index = len(data) - 5
+            await client.write(data[:split_index])
+            await asyncio.sleep(0.1)
+            await client.write(data[split_index:])
+
+            for counter in range(len(positions)):
+                header, command_status = await asyncio.wait_for(
+                    self.next_command_status(client), timeout=STD_TIMEOUT
+                )
+                assert header.counter == counter
+                assert command_status.status == hexrotcomm.CommandStatusCode.ACK
+            assert mock_ctrl.telemetry.cmd_position == positions[-1]
+
+    async def test_get_command_key(self) -> None:
+        async with self.make_mock_controller() as mock_ctrl:
+            command = hexrotcomm.Command()
+            command.code = hexrotcomm.SimpleCommandCode.MOVE
+            command.param1 = 3
+            key = mock_ctrl.get_command_key(command)
+            assert mock_ctrl.command_table[key] == mock_ctrl.do_position_set
+
+            command.code = hexrotcomm.SimpleCommandCode.SET_STATE
+            command.param1 = hexrotcomm.SetStateParam.STANDBY
+            key = mock_ctrl.get_command_key(command)
+            assert mock_ctrl.command_table[key] == mock_ctrl.do_standby
+
+            # A param1 too large to fit in the key must not match any command.
+            command.param1 += 1 << 16
+            key = mock_ctrl.get_command_key(command)
+            assert key not in mock_ctrl.command_table
+
+    async def test_update_and_get_header(self) -> None:
+        async with self.make_mock_controller() as mock_ctrl:
+            for frame_id in hexrotcomm.FrameId:
+                header, curr_tai = mock_ctrl.update_and_get_header(frame_id)
+                assert header.frame_id == frame_id
+                assert 0 <= header.tai_nsec < 1_000_000_000
+                header_tai = header.tai_sec + header.tai_nsec * 1e-9
+                assert header_tai == pytest.approx(curr_tai, abs=1e-6)
+
+    async def test_manual_mode(self) -> None:
+        async with self.make_mock_controller() as mock_ctrl, self.make_client(
+            mock_ctrl
+        ):
+            telemetry_written = asyncio.Event()
+
+            async def telemetry_callback(telemetry: ctypes.Structure) -> None:
+                telemetry_written.set()
+
+            mock_ctrl.telemetry_callback = telemetry_callback
+
+            # telemetry_loop sleeps right after calling telemetry_callback,
+            # so it writes no more telemetry once manual_mode is set.
+            await asyncio.wait_for(telemetry_written.wait(), timeout=STD_TIMEOUT)
+            mock_ctrl.manual_mode = True
+            telemetry_written.clear()
+            with pytest.raises(asyncio.TimeoutError):
+                await asyncio.wait_for(
+                    telemetry_written.wait(),
+                    timeout=mock_ctrl.telemetry_interval * 3,
+                )
+
+            for _ in range(2):
+                curr_position = mock_ctrl.telemetry.curr_position
+                await mock_ctrl.tick_once()
+                assert telemetry_written.is_set()
+                telemetry_written.clear()
+                # SimpleMockController.update_telemetry increments position.
+                assert mock_ctrl.telemetry.curr_position > curr_position
+
+            mock_ctrl.manual_mode = False
+            await asyncio.wait_for(telemetry_written.wait(), timeout=STD_TIMEOUT)
+
     async def next_command_status(
         self, client: tcpip.Client
     ) -> tuple[hexrotcomm.Header, hexrotcomm.CommandStatus]:
@@ -19,7 +19,9 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 import asyncio
+import ctypes
 import pathlib
+import typing
 import unittest
 import unittest.mock
 
@@ -34,56 +36,104 @@ from lsst.ts.xml.enums.MTHexapod import (
 
 STD_TIMEOUT = 5  # timeout for command ack
 
+# Mock controller telemetry interval (seconds) for tests that wait on
+# telemetry. BaseMockController.telemetry_loop reads telemetry_interval
+# for every message, so setting it on a running controller takes effect.
+FAST_TELEMETRY_INTERVAL = 0.01
+
+APPROX_ZERO = pytest.approx(0)
+
+# Mask to clear the DDS_COMMAND_SOURCE bit of the (uint32)
+# application_status telemetry field.
+CLEAR_DDS_MASK = ~int(ApplicationStatus.DDS_COMMAND_SOURCE) & 0xFFFFFFFF
+
+# An invalid initial state, one larger than any salobj.State.
+MAX_STATE_PLUS_ONE = max(salobj.State) + 1
+
 TEST_CONFIG_DIR = pathlib.Path(__file__).parent / "data" / "config"
 
+# Names of the invalid config files in TEST_CONFIG_DIR.
+BAD_CONFIG_NAMES = tuple(
+    sorted(path.name for path in TEST_CONFIG_DIR.glob("bad_*.yaml"))
+)
 
-class TestSimpleCsc(hexrotcomm.BaseCscTestCase, unittest.IsolatedAsyncioTestCase):
-    def basic_make_csc(
-        self,
-        config_dir: str | pathlib.Path,
-        initial_state: salobj.State,
-        simulation_mode: int,
-    ) -> hexrotcomm.SimpleCsc:
-        return hexrotcomm.SimpleCsc(
-            initial_state=initial_state,
-            simulation_mode=simulation_mode,
-            config_dir=config_dir,
-        )
 
-    async def test_constructor_errors(self) -> None:
-        for bad_initial_state in (0, salobj.State.OFFLINE, max(salobj.State) + 1):
-            with pytest.raises(ValueError):
-                hexrotcomm.SimpleCsc(
+def make_bad_constructor_args() -> list[tuple[str, dict[str, typing.Any]]]:
+    """Make a list of (description, kwargs) for bad SimpleCsc constructor
+    arguments.
+    """
+    bad_args = []
+    for bad_initial_state in (0, salobj.State.OFFLINE, MAX_STATE_PLUS_ONE):
+        state_name = getattr(bad_initial_state, "name", bad_initial_state)
+        bad_args.append(
+            (
+                f"initial_state={state_name}",
+                dict(
                     initial_state=bad_initial_state,
                     config_dir=TEST_CONFIG_DIR,
                     simulation_mode=1,
-                )
+                ),
+            )
+        )
 
-        for bad_simulation_mode in (-1, 0, 2):
-            with pytest.raises(ValueError):
-                hexrotcomm.SimpleCsc(
+    for bad_simulation_mode in (-1, 0, 2):
+        bad_args.append(
+            (
+                f"simulation_mode={bad_simulation_mode}",
+                dict(
                     initial_state=salobj.State.STANDBY,
                     config_dir=TEST_CONFIG_DIR,
                     simulation_mode=bad_simulation_mode,
-                )
+                ),
+            )
+        )
 
-        with pytest.raises(ValueError):
-            hexrotcomm.SimpleCsc(
+    bad_args.append(
+        (
+            "no_such_config_dir",
+            dict(
                 initial_state=salobj.State.STANDBY,
                 simulation_mode=1,
                 config_dir="no_such_directory",
-            )
-
-        # When not simulating the only valid initial state is STANDBY
-        for bad_initial_state in salobj.State:
-            if bad_initial_state == salobj.State.STANDBY:
-                continue
-            with pytest.raises(ValueError):
-                hexrotcomm.SimpleCsc(
+            ),
+        )
+    )
+
+    # When not simulating the only valid initial state is STANDBY
+    for bad_initial_state in salobj.State:
+        if bad_initial_state == salobj.State.STANDBY:
+            continue
+        bad_args.append(
+            (
+                f"not_simulating_initial_state={bad_initial_state.name}",
+                dict(
                     initial_state=bad_initial_state,
                     config_dir=TEST_CONFIG_DIR,
                     simulation_mode=0,
-                )
+                ),
+            )
+        )
+    return bad_args
+
+
+class TestSimpleCsc(hexrotcomm.BaseCscTestCase, unittest.IsolatedAsyncioTestCase):
+    def basic_make_csc(
+        self,
+        config_dir: str | pathlib.Path,
+        initial_state: salobj.State,
+        simulation_mode: int,
+    ) -> hexrotcomm.SimpleCsc:
+        return hexrotcomm.SimpleCsc(
+            initial_state=initial_state,
+            simulation_mode=simulation_mode,
+            config_dir=config_dir,
+        )
+
+    async def test_constructor_errors(self) -> None:
+        for description, kwargs in make_bad_constructor_args():
+            with self.subTest(description=description):
+                with pytest.raises(ValueError):
+                    hexrotcomm.SimpleCsc(**kwargs)
 
     async def test_invalid_config(self) -> None:
         async with self.make_csc(
@@ -93,8 +143,8 @@ class TestSimpleCsc(hexrotcomm.BaseCscTestCase, unittest.IsolatedAsyncioTestCase
         ):
             # Try config files with invalid data.
             # The command should fail and the summary state remain in STANDBY.
-            for bad_config_path in TEST_CONFIG_DIR.glob("bad_*.yaml"):
-                bad_config_name = bad_config_path.name
+            assert len(BAD_CONFIG_NAMES) > 0
+            for bad_config_name in BAD_CONFIG_NAMES:
                 with self.subTest(bad_config_name=bad_config_name):
                     with salobj.assertRaisesAckError():
                         await self.remote.cmd_start.set_start(
@@ -124,6 +174,7 @@ class TestSimpleCsc(hexrotcomm.BaseCscTestCase, unittest.IsolatedAsyncioTestCase
             await self.assert_next_sample(topic=self.remote.evt_errorCode, errorCode=0)
 
             self.csc.mock_ctrl.set_state(ControllerState.FAULT)
+            await self.csc.mock_ctrl.write_telemetry()
             await self.assert_next_sample(
                 topic=self.remote.evt_controllerState,
                 controllerState=ControllerState.FAULT,
@@ -158,7 +209,9 @@ class TestSimpleCsc(hexrotcomm.BaseCscTestCase, unittest.IsolatedAsyncioTestCase
             )
 
     async def test_no_config(self) -> None:
-        short_config_timeout = 1
+        # The mock controller never sends config in this test,
+        # so the timeout always expires; keep it short.
+        short_config_timeout = 0.05
         with unittest.mock.patch(
             "lsst.ts.hexrotcomm.base_csc.CONFIG_TIMEOUT", short_config_timeout
         ), unittest.mock.patch(
@@ -196,7 +249,6 @@ class TestSimpleCsc(hexrotcomm.BaseCscTestCase, unittest.IsolatedAsyncioTestCase
             simulation_mode=1,
             config_dir=TEST_CONFIG_DIR,
         ):
-            assert self.csc.client.should_be_connected
             await self.assert_next_sample(
                 topic=self.remote.evt_controllerState,
                 controllerState=ControllerState.ENABLED,
@@ -235,9 +287,7 @@ class TestSimpleCsc(hexrotcomm.BaseCscTestCase, unittest.IsolatedAsyncioTestCase
             )
 
             # Clear the DDS_COMMAND_SOURCE flag
-            self.csc.mock_ctrl.telemetry.application_status &= (
-                ~ApplicationStatus.DDS_COMMAND_SOURCE
-            )
+            self.csc.mock_ctrl.telemetry.application_status &= CLEAR_DDS_MASK
             await self.assert_next_sample(
                 topic=self.remote.evt_commandableByDDS,
                 state=False,
@@ -261,12 +311,9 @@ class TestSimpleCsc(hexrotcomm.BaseCscTestCase, unittest.IsolatedAsyncioTestCase
             Delay between commands (sec); or no delay if `None`.
             Only intended for unit testing.
         """
-        commands = []
-        for position in positions:
-            command = self.csc.make_command(
-                code=hexrotcomm.SimpleCommandCode.MOVE, param1=position
-            )
-            commands.append(command)
+        commands = self.csc.make_commands(
+            code=hexrotcomm.SimpleCommandCode.MOVE, param1=positions
+        )
         await self.csc.run_multiple_commands(*commands, delay=delay)
 
     async def test_move(self) -> None:
@@ -282,13 +329,49 @@ class TestSimpleCsc(hexrotcomm.BaseCscTestCase, unittest.IsolatedAsyncioTestCase
                 topic=self.remote.evt_controllerState,
                 controllerState=ControllerState.ENABLED,
             )
+            self.csc.mock_ctrl.telemetry_interval = FAST_TELEMETRY_INTERVAL
             data = await self.remote.tel_rotation.next(flush=True, timeout=STD_TIMEOUT)
-            assert data.demandPosition == pytest.approx(0)
+            assert data.demandPosition == APPROX_ZERO
             await self.remote.cmd_move.set_start(
                 position=destination, timeout=STD_TIMEOUT
             )
-            data = await self.remote.tel_rotation.next(flush=True, timeout=STD_TIMEOUT)
-            assert data.demandPosition == pytest.approx(destination)
+            # Telemetry written before the move was acknowledged
+            # may still arrive, so read until the move shows up.
+            async with asyncio.timeout(STD_TIMEOUT):
+                while True:
+                    data = await self.remote.tel_rotation.next(
+                        flush=False, timeout=STD_TIMEOUT
+                    )
+                    if data.demandPosition == pytest.approx(destination):
+                        break
+
+    async def test_make_commands(self) -> None:
+        async with self.make_csc(
+            initial_state=salobj.State.STANDBY,
+            simulation_mode=1,
+            config_dir=TEST_CONFIG_DIR,
+        ):
+            code = hexrotcomm.SimpleCommandCode.MOVE
+            param1_values = (1, 2, 3)
+            param3_values = (-4.5, 0, 6.25)
+            commands = self.csc.make_commands(
+                code=code, param1=param1_values, param3=param3_values
+            )
+            assert len(commands) == len(param1_values)
+            for command, param1, param3 in zip(commands, param1_values, param3_values):
+                assert command.code == code
+                assert command.counter == 0
+                assert command.param1 == param1
+                assert command.param3 == param3
+                for name in ("param2", "param4", "param5", "param6"):
+                    assert getattr(command, name) == 0
+
+            with pytest.raises(ValueError):
+                self.csc.make_commands(code=code, param7=param1_values)
+            with pytest.raises(ValueError):
+                self.csc.make_commands(code=code, param1=(1, 2), param2=(1, 2, 3))
+            with pytest.raises(ValueError):
+                self.csc.make_commands(code=code)
 
     async def test_run_multiple_commands(self) -> None:
         """Test BaseCsc.run_multiple_commands."""
@@ -302,42 +385,60 @@ class TestSimpleCsc(hexrotcomm.BaseCscTestCase, unittest.IsolatedAsyncioTestCase
                 topic=self.remote.evt_controllerState,
                 controllerState=ControllerState.ENABLED,
             )
+            self.csc.mock_ctrl.telemetry_interval = FAST_TELEMETRY_INTERVAL
             telemetry_delay = self.csc.mock_ctrl.telemetry_interval * 3
+            final_position = 1 + max(*target_positions)
 
-            # Record demand positions from the `rotation` telemetry topic.
+            # Record demand positions from the mock controller's telemetry,
+            # without duplicates, in the order they are first seen.
+            # Read them directly from the mock controller, rather than
+            # from the `rotation` telemetry topic (test_move tests that),
+            # to avoid a round trip through DDS for each sample.
             demand_positions = []
+            seen_demand_positions = set()
+            initial_telemetry_seen = asyncio.Event()
+            final_telemetry_seen = asyncio.Event()
 
-            async def rotation_callback(data: salobj.BaseMsgType) -> None:
-                if data.demandPosition not in demand_positions:
-                    demand_positions.append(data.demandPosition)
+            async def telemetry_callback(telemetry: ctypes.Structure) -> None:
+                if telemetry.cmd_position not in seen_demand_positions:
+                    seen_demand_positions.add(telemetry.cmd_position)
+                    demand_positions.append(telemetry.cmd_position)
+                initial_telemetry_seen.set()
+                if telemetry.cmd_position == final_position:
+                    final_telemetry_seen.set()
 
-            self.remote.tel_rotation.callback = rotation_callback
+            self.csc.mock_ctrl.telemetry_callback = telemetry_callback
 
             # Wait for initial telemetry.
-            await asyncio.sleep(telemetry_delay)
+            await asyncio.wait_for(initial_telemetry_seen.wait(), timeout=STD_TIMEOUT)
 
-            # Start moving to the specified positions
-            task1 = asyncio.ensure_future(
-                self.move_sequentially(*target_positions, delay=telemetry_delay)  # type: ignore[arg-type]
-            )
-            # Give this task a chance to start running
-            await asyncio.sleep(0.01)
+            async with asyncio.TaskGroup() as task_group:
+                # Start moving to the specified positions
+                task1 = task_group.create_task(
+                    self.move_sequentially(*target_positions, delay=telemetry_delay)  # type: ignore[arg-type]
+                )
+                # Let this task start running; one pass of the event loop
+                # is enough for it to acquire the command lock.
+                await asyncio.sleep(0)
 
-            # Try to move to yet another position; this should be delayed
-            # until the first set of moves is finished.
-            other_move = self.csc.cmd_move.DataType()
-            other_move.position = 1 + max(*target_positions)
-            await self.csc.do_move(other_move)
+                # Try to move to yet another position; this should be delayed
+                # until the first set of moves is finished.
+                other_move = self.csc.cmd_move.DataType()
+                other_move.position = final_position
+                await self.csc.do_move(other_move)
 
-            # task1 should have finished before the do_move command.
-            assert task1.done()
+                # task1 should have finished before the do_move command.
+                assert task1.done()
 
             # Wait for final telemetry.
-            await asyncio.sleep(telemetry_delay)
+            await asyncio.wait_for(final_telemetry_seen.wait(), timeout=STD_TIMEOUT)
 
             expected_positions = [0] + list(target_positions) + [other_move.position]
             assert expected_positions == demand_positions
 
+    # This repeats transitions that other tests also make,
+    # so it may be skipped for quick runs with ``pytest -m "not slow"``.
+    @pytest.mark.slow
     async def test_standard_state_transitions(self) -> None:
         async with self.make_csc(
             initial_state=salobj.State.STANDBY,